@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+import cv2
+import numpy as np
+from firelink.config.settings import config
+
+class ClipRecorder:
+    """Тримає останні секунди відео у JPEG-кільцевому буфері з обмеженням пам'яті та зберігає кліпи подій."""
+
+    # Скільки ще чекати кадри кінця інтервалу, що можуть стояти в черзі кодування
+    WRITE_GRACE_SECONDS = 1.0
+
+    def __init__(self, source_name):
+        recorder_config = config.get('clip_recorder', {}) or {}
+        self.source_name = source_name
+        self.pre_seconds = recorder_config.get('pre_seconds', 10)
+        self.post_seconds = recorder_config.get('post_seconds', 5)
+        self.max_buffer_bytes = int(recorder_config.get('max_buffer_mb', 64) * 1024 * 1024)
+        self.jpeg_quality = recorder_config.get('jpeg_quality', 80)
+        self.clip_dir = Path(recorder_config.get('clip_dir', 'firelink/clips'))
+
+        # Кожен елемент: (час кадру, закодований JPEG)
+        self.frames = deque()
+        self.buffer_bytes = 0
+        self.lock = threading.Lock()
+        self.frame_added = threading.Condition(self.lock)
+        self.writer_threads = []
+
+        # Кадри з GUI-потоку кодуються у фоні; при переповненні черги кадр пропускається
+        self.encode_queue = queue.Queue(maxsize=recorder_config.get('encode_queue_size', 4))
+        self.encoder_thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self.encoder_thread.start()
+
+    def push_frame(self, frame):
+        """Передає кадр на фонове кодування; не блокує GUI-потік."""
+        try:
+            self.encode_queue.put_nowait((time.time(), frame))
+        except queue.Full:
+            pass
+
+    def _encode_loop(self):
+        """Кодує кадри з черги у JPEG і додає їх до кільцевого буфера."""
+        while True:
+            item = self.encode_queue.get()
+            if item is None:
+                return
+            frame_time, frame = item
+            ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                self._append_encoded(frame_time, encoded.tobytes())
+
+    def _append_encoded(self, now, data):
+        # Буфер покриває і пре-, і пост-інтервал, щоб кадри до події дожили до запису кліпу
+        horizon = now - (self.pre_seconds + self.post_seconds)
+        with self.lock:
+            self.frames.append((now, data))
+            self.buffer_bytes += len(data)
+            while self.frames and (self.frames[0][0] < horizon or self.buffer_bytes > self.max_buffer_bytes):
+                _, old = self.frames.popleft()
+                self.buffer_bytes -= len(old)
+            self.frame_added.notify_all()
+
+    def trigger(self, event_type, on_done=None):
+        """Планує запис кліпу навколо поточного моменту і одразу повертає шлях до майбутнього файлу.
+
+        Після запису викликається on_done(шлях, помилка); помилка None означає, що кліп збережено.
+        """
+        event_time = time.time()
+        stamp = datetime.utcfromtimestamp(event_time).strftime("%Y%m%dT%H%M%S_%f")
+        clip_path = self.clip_dir / f"{stamp}_{event_type}_{self.source_name}.avi"
+        thread = threading.Thread(target=self._record_clip, args=(event_time, clip_path, on_done), daemon=True)
+        with self.lock:
+            self.writer_threads = [t for t in self.writer_threads if t.is_alive()]
+            self.writer_threads.append(thread)
+        thread.start()
+        return str(clip_path)
+
+    def _record_clip(self, event_time, clip_path, on_done):
+        """Чекає завершення пост-інтервалу, записує кліп і повідомляє результат."""
+        end = event_time + self.post_seconds
+        time.sleep(max(0.0, end - time.time()))
+        self._wait_for_frames_until(end, self.WRITE_GRACE_SECONDS)
+        try:
+            error = self._write_clip(event_time, clip_path)
+        except Exception as e:
+            error = str(e)
+        if error is None:
+            print(f"Saved {self.source_name} clip: {clip_path}")
+        else:
+            print(f"Failed to write {self.source_name} clip {clip_path}: {error}")
+        if on_done:
+            on_done(str(clip_path), error)
+
+    def _wait_for_frames_until(self, end, timeout):
+        """Чекає, доки в буфері з'явиться кадр не раніше за end, але не довше за timeout."""
+        with self.frame_added:
+            return self.frame_added.wait_for(lambda: self.frames and self.frames[-1][0] >= end, timeout)
+
+    def _write_clip(self, event_time, clip_path):
+        """Записує буферизовані кадри інтервалу події; повертає опис помилки або None."""
+        start, end = event_time - self.pre_seconds, event_time + self.post_seconds
+        with self.lock:
+            clip_frames = [data for t, data in self.frames if start <= t <= end]
+            timestamps = [t for t, _ in self.frames if start <= t <= end]
+        if not clip_frames:
+            return "no buffered frames"
+
+        duration = timestamps[-1] - timestamps[0]
+        fps = (len(clip_frames) - 1) / duration if duration > 0 else 30.0
+        self.clip_dir.mkdir(parents=True, exist_ok=True)
+        writer = None
+        try:
+            for data in clip_frames:
+                frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    writer = cv2.VideoWriter(str(clip_path), cv2.VideoWriter_fourcc(*'MJPG'), fps, (w, h))
+                    if not writer.isOpened():
+                        return "video writer could not be opened"
+                writer.write(frame)
+        finally:
+            if writer is not None:
+                writer.release()
+        if not clip_path.is_file():
+            return "clip file was not created"
+        return None
+
+    def close(self):
+        """Зупиняє кодування та дочікується запису кліпів, що вже в процесі."""
+        self.encode_queue.put(None)
+        self.encoder_thread.join()
+        with self.lock:
+            threads = list(self.writer_threads)
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,313 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+from datetime import date, datetime, time
+from pathlib import Path
+from firelink.config.settings import config
+
+class EventIndex:
+    """Інкрементальний індекс над ротованими JSON-логами подій (events.json, events.json.1, ...)."""
+
+    # Затримка відкладеного збереження, щоб серія подій не перезаписувала індекс на кожен запис
+    SAVE_DELAY = 2.0
+    QUERY_ATTEMPTS = 3
+
+    def __init__(self, event_log_path, backup_count=10, grid_deg=None):
+        self.event_log_path = Path(event_log_path)
+        self.backup_count = backup_count
+        index_config = config.get('event_index', {}) or {}
+        self.grid_deg = float(grid_deg or index_config.get('grid_deg', 0.01))
+        # Кожен сегмент зберігається окремим файлом: закриті ротовані сегменти пишуться один раз
+        self.index_dir = self.event_log_path.with_name(self.event_log_path.name + ".idx")
+        # Сегменти ідентифікуються хешем першого рядка, бо ротація перейменовує файли
+        self.segments = {}
+        self.dirty = set()
+        # Індекс оновлюється з GUI-потоку та з потоків відправки координат
+        self.lock = threading.RLock()
+        self.save_timer = None
+        self._load()
+
+    def _load(self):
+        """Завантажує індекс з диску, якщо він сумісний з поточними налаштуваннями."""
+        manifest_path = self.index_dir / "manifest.json"
+        if not manifest_path.is_file():
+            return
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Event index is unreadable, rebuilding: {e}")
+            return
+        if manifest.get('grid_deg') != self.grid_deg:
+            return
+        for path in self.index_dir.glob("*.json"):
+            if path.name == "manifest.json":
+                continue
+            try:
+                with open(path, "r") as f:
+                    self.segments[path.stem] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Event index segment {path.name} is unreadable, rebuilding it: {e}")
+
+    def _write_json(self, path, payload):
+        """Атомарно записує JSON через унікальний тимчасовий файл."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _schedule_save(self):
+        if self.save_timer is None:
+            self.save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self.save_timer.daemon = True
+            self.save_timer.start()
+
+    def flush(self):
+        """Зберігає на диск лише змінені сегменти та прибирає файли видалених."""
+        with self.lock:
+            self.save_timer = None
+            payloads = {key: json.dumps(self.segments[key]) for key in self.dirty if key in self.segments}
+            live_keys = set(self.segments)
+            self.dirty.clear()
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._write_json(self.index_dir / "manifest.json", json.dumps({'grid_deg': self.grid_deg}))
+            for key, payload in payloads.items():
+                self._write_json(self.index_dir / f"{key}.json", payload)
+            for path in self.index_dir.glob("*.json"):
+                if path.name != "manifest.json" and path.stem not in live_keys:
+                    path.unlink()
+        except OSError as e:
+            print(f"Failed to save event index: {e}")
+            with self.lock:
+                self.dirty.update(payloads)
+                self._schedule_save()
+
+    def close(self):
+        """Скасовує відкладене збереження та одразу записує зміни."""
+        with self.lock:
+            if self.save_timer is not None:
+                self.save_timer.cancel()
+        self.flush()
+
+    def _segment_files(self):
+        """Повертає наявні файли логу від найстарішого до найновішого."""
+        paths = [Path(f"{self.event_log_path}.{i}") for i in range(self.backup_count, 0, -1)]
+        paths.append(self.event_log_path)
+        return [p for p in paths if p.is_file()]
+
+    @staticmethod
+    def _segment_key(path):
+        with open(path, "rb") as f:
+            first_line = f.readline()
+        if not first_line.endswith(b"\n"):
+            return None
+        return hashlib.sha1(first_line).hexdigest()
+
+    def _cell(self, lat, lon):
+        return f"{math.floor(lat / self.grid_deg)}:{math.floor(lon / self.grid_deg)}"
+
+    def update(self):
+        """Доіндексовує нові рядки у всіх файлах логу та прибирає видалені сегменти."""
+        with self.lock:
+            return self._update()
+
+    def _update(self):
+        changed = False
+        seen = set()
+        for path in self._segment_files():
+            key = self._segment_key(path)
+            if key is None:
+                continue
+            seen.add(key)
+            segment = self.segments.get(key)
+            if segment is None:
+                segment = {'size': 0, 't_min': None, 't_max': None, 'types': {}, 'cells': {}}
+                self.segments[key] = segment
+            if segment.get('file') != path.name:
+                segment['file'] = path.name
+                self.dirty.add(key)
+            if path.stat().st_size > segment['size'] and self._index_tail(path, segment):
+                self.dirty.add(key)
+                changed = True
+
+        for key in list(self.segments):
+            if key not in seen:
+                del self.segments[key]
+                changed = True
+
+        if changed:
+            self._schedule_save()
+        return changed
+
+    def _index_tail(self, path, segment):
+        """Індексує повні рядки файлу починаючи з останнього проіндексованого зміщення."""
+        offset = segment['size']
+        changed = False
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Незавершений запис — доіндексуємо при наступному оновленні
+                    break
+                line_offset = offset
+                offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._add_entry(segment, line_offset, entry)
+                changed = True
+        if offset != segment['size']:
+            segment['size'] = offset
+            changed = True
+        return changed
+
+    def _add_entry(self, segment, offset, entry):
+        timestamp = entry.get('timestamp')
+        if timestamp:
+            if segment['t_min'] is None or timestamp < segment['t_min']:
+                segment['t_min'] = timestamp
+            if segment['t_max'] is None or timestamp > segment['t_max']:
+                segment['t_max'] = timestamp
+
+        event_type = entry.get('event_type') or ""
+        segment['types'].setdefault(event_type, []).append(offset)
+
+        data = entry.get('data')
+        if isinstance(data, dict):
+            lat, lon = data.get('lat'), data.get('lon')
+            if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
+                segment['cells'].setdefault(self._cell(lat, lon), []).append(offset)
+
+    def _cells_in_bbox(self, segment, bbox):
+        lat_min, lon_min, lat_max, lon_max = bbox
+        i_min, i_max = math.floor(lat_min / self.grid_deg), math.floor(lat_max / self.grid_deg)
+        j_min, j_max = math.floor(lon_min / self.grid_deg), math.floor(lon_max / self.grid_deg)
+        offsets = set()
+        for cell, cell_offsets in segment['cells'].items():
+            i, j = (int(v) for v in cell.split(":"))
+            if i_min <= i <= i_max and j_min <= j <= j_max:
+                offsets.update(cell_offsets)
+        return offsets
+
+    def _candidate_offsets(self, segment, event_type, bbox):
+        if event_type is not None:
+            offsets = set(segment['types'].get(event_type, []))
+        else:
+            offsets = set()
+            for type_offsets in segment['types'].values():
+                offsets.update(type_offsets)
+        if bbox is not None and offsets:
+            offsets &= self._cells_in_bbox(segment, bbox)
+        return sorted(offsets)
+
+    def query(self, event_type=None, start=None, end=None, bbox=None):
+        """Повертає записи подій за типом, часовим діапазоном та bbox (lat_min, lon_min, lat_max, lon_max)."""
+        start = _normalize_time(start)
+        end = _normalize_time(end, end_of_day=True)
+        with self.lock:
+            # Якщо файли ротувались під час запиту, доіндексовуємо і повторюємо
+            for _ in range(self.QUERY_ATTEMPTS):
+                self._update()
+                results = self._query(event_type, start, end, bbox)
+                if results is not None:
+                    return results
+            print("Event logs kept rotating during query; results may be incomplete.")
+            return self._query(event_type, start, end, bbox, skip_rotated=True) or []
+
+    def _query(self, event_type, start, end, bbox, skip_rotated=False):
+        """Читає записи за зміщеннями індексу; повертає None, якщо файл вже містить інший сегмент."""
+        results = []
+        files = {segment['file']: key for key, segment in self.segments.items()}
+        for path in self._segment_files():
+            key = files.get(path.name)
+            segment = self.segments.get(key)
+            if segment is None or segment['t_min'] is None:
+                continue
+            if start is not None and segment['t_max'] < start:
+                continue
+            if end is not None and segment['t_min'] > end:
+                continue
+            offsets = self._candidate_offsets(segment, event_type, bbox)
+            if not offsets:
+                continue
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                if skip_rotated:
+                    continue
+                return None
+            with f:
+                # Перевіряємо сегмент через відкритий дескриптор: подальша ротація його вже не змінить
+                first_line = f.readline()
+                if not first_line.endswith(b"\n") or hashlib.sha1(first_line).hexdigest() != key:
+                    if skip_rotated:
+                        continue
+                    return None
+                for offset in offsets:
+                    f.seek(offset)
+                    try:
+                        entry = json.loads(f.readline())
+                    except ValueError:
+                        continue
+                    if _matches(entry, event_type, start, end, bbox):
+                        results.append(entry)
+        return results
+
+def _normalize_time(value, end_of_day=False):
+    """Приводить час до формату ISO, у якому LogService пише мітки часу.
+
+    Дата без часу як верхня межа означає кінець цього дня включно.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value) if len(value) == 10 else datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.max if end_of_day else time.min)
+    return value.isoformat()
+
+def _matches(entry, event_type, start, end, bbox):
+    if event_type is not None and entry.get('event_type') != event_type:
+        return False
+    timestamp = entry.get('timestamp') or ""
+    if start is not None and timestamp < start:
+        return False
+    if end is not None and timestamp > end:
+        return False
+    if bbox is not None:
+        data = entry.get('data') or {}
+        lat, lon = data.get('lat'), data.get('lon')
+        if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+            return False
+        lat_min, lon_min, lat_max, lon_max = bbox
+        if not (lat_min <= lat <= lat_max and lon_min <= lon <= lon_max):
+            return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Query Firelink event logs using the sidecar index.")
+    parser.add_argument('--type', dest='event_type', help="event_type to match, e.g. fire_coords_failed")
+    parser.add_argument('--since', help="UTC start time in ISO format")
+    parser.add_argument('--until', help="UTC end time in ISO format; a bare date includes the whole day")
+    parser.add_argument('--bbox', nargs=4, type=float, metavar=('LAT_MIN', 'LON_MIN', 'LAT_MAX', 'LON_MAX'))
+    parser.add_argument('--log', default=None, help="path to events.json")
+    args = parser.parse_args()
+
+    log_path = Path(args.log) if args.log else Path(config.get('log_dir', '/home/jetson/firelink/logs')) / "events.json"
+    index = EventIndex(log_path)
+    for entry in index.query(args.event_type, args.since, args.until, args.bbox):
+        print(json.dumps(entry))
+    index.close()
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
 from firelink.config.settings import config
+from firelink.core.event_index import EventIndex
 
 class LogService:
     def __init__(self):
@@ -18,6 +19,8 @@ class LogService:
         # логгер подій (JSON)
         self.event_log_path = self.log_dir / "events.json"
         self.event_logger = self._setup_event_logger()
+        self.event_index = EventIndex(self.event_log_path, backup_count=10)
+        self.event_index.update()
 
     def _setup_telemetry_logger(self):
         """Налаштовує логгер для телеметрії у форматі CSV."""
@@ -54,6 +57,47 @@ class LogService:
         self.telemetry_writer.writerow(row)
         self.telemetry_file.flush()
 
+    def read_telemetry_track(self, since=None):
+        """Повертає точки (lat, lon) з CSV телеметрії, записані не раніше за since (UTC).
+
+        Рядки дописуються в хронологічному порядку, тож початок вікна шукаємо бінарним
+        пошуком за зміщенням у файлі і читаємо лише його, а не всю історію.
+        """
+        since = since.isoformat() if since is not None else ""
+        points = []
+        with open(self.telemetry_log_path, 'rb') as f:
+            f.seek(self._telemetry_offset(f, since))
+            lines = (line.decode('utf-8', errors='ignore') for line in f)
+            for row in csv.reader(lines):
+                if len(row) < 3 or row[0] == 'timestamp' or row[0] < since:
+                    continue
+                try:
+                    points.append((float(row[1]), float(row[2])))
+                except ValueError:
+                    continue
+        return points
+
+    @staticmethod
+    def _telemetry_offset(f, since):
+        """Бінарний пошук зміщення першого рядка з міткою часу не раніше за since."""
+        f.seek(0, 2)
+        lo, hi = 0, f.tell()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()  # дочитуємо рядок, у середину якого потрапили
+            line = f.readline()
+            if not line or line.split(b',', 1)[0].decode('utf-8', errors='ignore') >= since:
+                hi = mid
+            else:
+                lo = mid + 1
+        if lo == 0:
+            return 0
+        # Зміщення lo вказує всередину рядка, що передує шуканому
+        f.seek(lo)
+        f.readline()
+        return f.tell()
+
     def log_event(self, event_type, data):
         """Записує подію у JSON файл."""
         log_entry = {
@@ -62,9 +106,18 @@ class LogService:
             "data": data
         }
         self.event_logger.info(json.dumps(log_entry))
+        try:
+            self.event_index.update()
+        except OSError as e:
+            print(f"Failed to update event index: {e}")
+
+    def query_events(self, event_type=None, start=None, end=None, bbox=None):
+        """Шукає події через індекс по всіх ротованих файлах логу."""
+        return self.event_index.query(event_type, start, end, bbox)
 
     def close(self):
         """Закриває файли логів."""
         if hasattr(self, 'telemetry_file') and not self.telemetry_file.closed:
             self.telemetry_file.close()
         #  логгери подій закриваються автоматично
+        self.event_index.close()
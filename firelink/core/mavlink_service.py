@@ -2,13 +2,23 @@ import threading
 import time
 import math
 import json
+from collections import deque
 from pymavlink import mavutil
 from firelink.config.settings import config
 
 class MavlinkService:
-    def __init__(self, simulation=False):
+    # Стани, у яких лінк вважається робочим
+    CONNECTED_STATES = ('connected', 'degraded')
+
+    def __init__(self, simulation=False, on_state_change=None):
         self.port = config['pixhawk']['port']
         self.baud = config['pixhawk']['baud']
+        self.heartbeat_timeout = config['pixhawk'].get('heartbeat_timeout', 5)
+        self.heartbeat_loss_timeout = config['pixhawk'].get('heartbeat_loss_timeout', 3)
+        self.reconnect_backoff_min, self.reconnect_backoff_max = config['pixhawk'].get('reconnect_backoff', [1, 30])
+        self.degraded_packet_loss = config['pixhawk'].get('degraded_packet_loss', 20)
+        self.link_quality_window = config['pixhawk'].get('link_quality_window', 10)
+        self.link_quality_report_interval = config['pixhawk'].get('link_quality_report_interval', 5)
         self.recon_sysid = config['sys']['recon_sysid']
         self.recon_compid = config['sys']['recon_compid']
         self.operator_sysid = config['sys']['operator_sysid']
@@ -19,44 +29,155 @@ class MavlinkService:
             'lat': 50.4501, 'lon': 30.5234, 'alt': 150.0,
             'heading': 0, 'yaw': 0.0, 'pitch': 0.0, 'roll': 0.0
         }
+        # Плейсхолдер координат вище не є позицією: трасу будуємо лише після реального фіксу
+        self.position_received = False
+        self.gps_fix_type = None
+        self.link_state = 'disconnected'
+        self.link_info = {}
+        self.last_heartbeat = None
+        self.autopilot_sysid = None
+        # Знімки лічильників (mav_loss, mav_count) для оцінки втрат у ковзному вікні
+        self.loss_samples = deque()
+        self.last_quality_report = (0.0, None)
+        self.on_state_change = on_state_change
+        self.stop_event = threading.Event()
         self.thread = threading.Thread(target=self._run, daemon=True)
         self.ack_received = threading.Event()
         self.ack_simulation_timer = None
 
     def connect(self):
-        """Встановлює з'єднання з Pixhawk або запускає симуляцію."""
+        """Запускає фоновий супервізор з'єднання з Pixhawk або симуляцію; не блокує виклик."""
         if self.simulation:
-            self.is_connected = True
             print("Running in simulation mode.")
-            self.thread.start()
-            return
-        try:
-            self.conn = mavutil.mavlink_connection(self.port, baud=self.baud,
-                                                   source_system=self.recon_sysid,
-                                                   source_component=self.recon_compid)
-            self.conn.wait_heartbeat()
-            self.is_connected = True
-            print("Pixhawk connected!")
-            self.thread.start()
-        except Exception as e:
-            self.is_connected = False
-            print(f"Failed to connect to Pixhawk: {e}")
+        self.thread.start()
+
+    def _set_state(self, state, info=None, notify=False):
+        """Оновлює стан лінку та повідомляє підписника про зміну стану (або примусово, якщо notify)."""
+        changed = state != self.link_state
+        self.link_state = state
+        self.link_info = info or {}
+        self.is_connected = state in self.CONNECTED_STATES
+        if changed or notify:
+            print(f"MAVLink link state: {state} {self.link_info}")
+            if self.on_state_change:
+                self.on_state_change(state, self.link_info)
 
     def _run(self):
-        """Основний цикл для отримання MAVLink повідомлень або симуляції."""
+        """Супервізор: підключається, отримує повідомлення та перепідключається з backoff після збоїв."""
         if self.simulation:
-            while self.is_connected:
+            self._set_state('connected')
+            while not self.stop_event.is_set():
                 self._simulate_telemetry()
-                time.sleep(1)
-        else:
-            while self.is_connected:
-                try:
-                    msg = self.conn.recv_match(blocking=True, timeout=1)
-                    if msg:
-                        self._handle_message(msg)
-                except Exception as e:
-                    print(f"Error while receiving MAVLink message: {e}")
-                    self.is_connected = False
+                self.stop_event.wait(1)
+            return
+
+        backoff = self.reconnect_backoff_min
+        while not self.stop_event.is_set():
+            error = self._open_connection()
+            if error is None:
+                backoff = self.reconnect_backoff_min
+                error = self._receive_loop()
+                self._close_connection()
+                if error is not None:
+                    self._set_state('lost', {'error': error})
+            if self.stop_event.is_set():
+                break
+            self._set_state('reconnecting', {'error': error, 'retry_in': backoff})
+            self.stop_event.wait(backoff)
+            backoff = min(backoff * 2, self.reconnect_backoff_max)
+        self._set_state('disconnected')
+
+    def _open_connection(self):
+        """Відкриває з'єднання та чекає heartbeat; повертає опис помилки або None."""
+        self._set_state('connecting', {'port': self.port})
+        try:
+            conn = mavutil.mavlink_connection(self.port, baud=self.baud,
+                                              source_system=self.recon_sysid,
+                                              source_component=self.recon_compid)
+        except Exception as e:
+            print(f"Failed to open MAVLink connection: {e}")
+            return str(e)
+        try:
+            heartbeat = self._wait_autopilot_heartbeat(conn)
+        except Exception as e:
+            heartbeat = None
+            print(f"Error while waiting for heartbeat: {e}")
+        if heartbeat is None:
+            conn.close()
+            return f"no autopilot heartbeat within {self.heartbeat_timeout}s"
+        # Далі втрату лінку відстежуємо лише за heartbeat цього автопілота
+        self.autopilot_sysid = heartbeat.get_srcSystem()
+        self.conn = conn
+        self.last_heartbeat = time.time()
+        self.loss_samples = deque([(conn.mav_loss, conn.mav_count)], maxlen=self.link_quality_window + 1)
+        self.last_quality_report = (0.0, None)
+        print("Pixhawk connected!")
+        self._set_state('connected', {'port': self.port, 'autopilot_sysid': self.autopilot_sysid})
+        return None
+
+    def _wait_autopilot_heartbeat(self, conn):
+        """Чекає heartbeat від автопілота, ігноруючи GCS та власні повідомлення."""
+        deadline = time.time() + self.heartbeat_timeout
+        while not self.stop_event.is_set():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            msg = conn.recv_match(type='HEARTBEAT', blocking=True, timeout=min(remaining, 0.5))
+            if (msg and msg.get_srcSystem() != self.recon_sysid
+                    and msg.autopilot != mavutil.mavlink.MAV_AUTOPILOT_INVALID):
+                return msg
+        return None
+
+    def _receive_loop(self):
+        """Отримує повідомлення, стежить за heartbeat та якістю лінку; повертає причину розриву."""
+        last_quality_check = time.time()
+        while not self.stop_event.is_set():
+            try:
+                msg = self.conn.recv_match(blocking=True, timeout=0.5)
+            except Exception as e:
+                print(f"Error while receiving MAVLink message: {e}")
+                return str(e)
+            now = time.time()
+            if msg:
+                if msg.get_type() == 'HEARTBEAT' and msg.get_srcSystem() == self.autopilot_sysid:
+                    self.last_heartbeat = now
+                self._handle_message(msg)
+            if now - self.last_heartbeat > self.heartbeat_loss_timeout:
+                return f"heartbeat lost for {now - self.last_heartbeat:.1f}s"
+            if now - last_quality_check >= 1:
+                last_quality_check = now
+                self._update_link_quality(now)
+        return None
+
+    def _update_link_quality(self, now):
+        """Оцінює втрату пакетів за останні link_quality_window секунд і перемикає connected/degraded."""
+        self.loss_samples.append((self.conn.mav_loss, self.conn.mav_count))
+        (old_loss, old_count), (new_loss, new_count) = self.loss_samples[0], self.loss_samples[-1]
+        lost, received = new_loss - old_loss, new_count - old_count
+        packet_loss = 100.0 * lost / (lost + received) if lost + received > 0 else 0.0
+        info = {
+            'port': self.port,
+            'autopilot_sysid': self.autopilot_sysid,
+            'packet_loss': round(packet_loss, 1),
+            'heartbeat_age': round(now - self.last_heartbeat, 1),
+        }
+        state = 'degraded' if packet_loss > self.degraded_packet_loss else 'connected'
+
+        # Зміну якості без зміни стану повідомляємо не частіше за link_quality_report_interval
+        last_report_time, last_reported_loss = self.last_quality_report
+        notify = (round(packet_loss) != last_reported_loss
+                  and now - last_report_time >= self.link_quality_report_interval)
+        if notify or state != self.link_state:
+            self.last_quality_report = (now, round(packet_loss))
+        self._set_state(state, info, notify=notify)
+
+    def _close_connection(self):
+        conn, self.conn = self.conn, None
+        if conn:
+            try:
+                conn.close()
+            except Exception as e:
+                print(f"Error while closing MAVLink connection: {e}")
 
     def _handle_message(self, msg):
         """Обробляє вхідні MAVLink повідомлення."""
@@ -65,6 +186,10 @@ class MavlinkService:
             self.telemetry['lat'] = msg.lat / 1e7
             self.telemetry['lon'] = msg.lon / 1e7
             self.telemetry['alt'] = msg.alt / 1000
+            # 0, 0 автопілот надсилає, поки GPS не має фіксу
+            self.position_received = not (msg.lat == 0 and msg.lon == 0)
+        elif msg_type == 'GPS_RAW_INT':
+            self.gps_fix_type = msg.fix_type
         elif msg_type == 'VFR_HUD':
             self.telemetry['heading'] = msg.heading
         elif msg_type == 'ATTITUDE':
@@ -92,6 +217,14 @@ class MavlinkService:
     def get_telemetry(self):
         return self.telemetry
 
+    def has_position_fix(self):
+        """Чи є у телеметрії реальна позиція з валідним GPS-фіксом."""
+        if self.simulation:
+            return True
+        if not self.position_received:
+            return False
+        return self.gps_fix_type is None or self.gps_fix_type >= mavutil.mavlink.GPS_FIX_TYPE_3D_FIX
+
     def send_fire_coords(self, lat, lon, alt, confidence):
         """Формує та відправляє координати пожежі з логікою повторних спроб."""
         payload = {
@@ -107,7 +240,14 @@ class MavlinkService:
             print(f"Sending fire coordinates (attempt {i+1}/{retry_count}): {text}")
 
             if not self.simulation:
-                self.conn.mav.statustext_send(mavutil.mavlink.MAV_SEVERITY_WARNING, text.encode('utf-8'))
+                conn = self.conn
+                if conn is None or not self.is_connected:
+                    print("MAVLink link is down, waiting for reconnect before next attempt.")
+                else:
+                    try:
+                        conn.mav.statustext_send(mavutil.mavlink.MAV_SEVERITY_WARNING, text.encode('utf-8'))
+                    except Exception as e:
+                        print(f"Failed to send STATUSTEXT: {e}")
             else:
                 # В режимі симуляції імітуємо отримання ACK
                 self.ack_simulation_timer = threading.Timer(2.0, self._simulate_ack)
@@ -135,11 +275,11 @@ class MavlinkService:
         self._handle_message(fake_msg)
 
     def close(self):
-        self.is_connected = False
+        self.stop_event.set()
         if self.thread.is_alive():
-            self.thread.join()
+            # Усі очікування супервізора перевіряють stop_event щонайменше кожні 0.5 с
+            self.thread.join(timeout=2)
         if self.ack_simulation_timer:
             self.ack_simulation_timer.cancel()
-        if self.conn:
-            self.conn.close()
+        self._close_connection()
         print("Mavlink connection closed.")
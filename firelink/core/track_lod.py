@@ -0,0 +1,142 @@
+import math
+
+# Допуски рівнів деталізації у градусах: від ~0.1 м до кількох кілометрів
+TIER_TOLERANCES = [1e-6 * 2 ** k for k in range(16)]
+
+def simplify_path(points, tolerance):
+    """Спрощує ламану алгоритмом Дугласа-Пекера (ітеративно, без рекурсії)."""
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        max_dist, index = 0.0, None
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length > 0:
+                dist = abs(dy * (px - x1) - dx * (py - y1)) / length
+            else:
+                dist = math.hypot(px - x1, py - y1)
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if index is not None and max_dist > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+def select_tier(scale):
+    """Обирає найгрубший рівень, похибка якого не перевищує пів пікселя при масштабі scale (пікселів на градус)."""
+    max_error = 0.5 / scale
+    tier = 0
+    for i, tolerance in enumerate(TIER_TOLERANCES):
+        if tolerance <= max_error:
+            tier = i
+    return tier
+
+class TrackLod:
+    """Траса з рівнями деталізації: бінарне дерево груп чанків, спрощених знизу вгору.
+
+    Вузол (level, j) покриває чанки [j * 2^level, (j + 1) * 2^level) і зберігає ламану,
+    спрощену з допуском рівня level з уже спрощених дочірніх вузлів. Тому на грубому рівні
+    вся траса малюється кількома вузлами, а відсікання за межами обходить лише видимі гілки.
+    """
+
+    CHUNK_SIZE = 256
+
+    def __init__(self):
+        self.points = []
+        self.node_points = {}
+        self.node_bounds = {}
+
+    def append(self, point):
+        """Додає точку, пропускаючи повтор попередньої; повертає True, якщо точку додано."""
+        if self.points and self.points[-1] == point:
+            return False
+        self.points.append(point)
+        return True
+
+    @property
+    def finished_chunks(self):
+        # Чанки перекриваються крайньою точкою, тож чанк завершено, коли є точка після нього
+        return max(len(self.points) - 1, 0) // self.CHUNK_SIZE
+
+    def _chunk_points(self, index):
+        start = index * self.CHUNK_SIZE
+        return self.points[start:start + self.CHUNK_SIZE + 1]
+
+    def node_path(self, level, j, tier=None):
+        """Спрощена ламана вузла; обчислюється один раз і кешується.
+
+        Кореневі вузли нижчого рівня, ніж tier, додатково спрощуються до допуску tier.
+        """
+        if tier is not None and tier > level:
+            key = (level, j, tier)
+            path = self.node_points.get(key)
+            if path is None:
+                path = simplify_path(self.node_path(level, j), TIER_TOLERANCES[tier])
+                self.node_points[key] = path
+            return path
+        key = (level, j)
+        path = self.node_points.get(key)
+        if path is None:
+            if level == 0:
+                path = simplify_path(self._chunk_points(j), TIER_TOLERANCES[0])
+            else:
+                left = self.node_path(level - 1, 2 * j)
+                right = self.node_path(level - 1, 2 * j + 1)
+                # Правий вузол починається з останньої точки лівого
+                path = simplify_path(left + right[1:], TIER_TOLERANCES[level])
+            self.node_points[key] = path
+        return path
+
+    def bounds(self, level, j):
+        """Межі вузла (min_x, min_y, max_x, max_y) за сирими точками."""
+        key = (level, j)
+        bounds = self.node_bounds.get(key)
+        if bounds is None:
+            if level == 0:
+                chunk = self._chunk_points(j)
+                xs = [p[0] for p in chunk]
+                ys = [p[1] for p in chunk]
+                bounds = (min(xs), min(ys), max(xs), max(ys))
+            else:
+                a = self.bounds(level - 1, 2 * j)
+                b = self.bounds(level - 1, 2 * j + 1)
+                bounds = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+            self.node_bounds[key] = bounds
+        return bounds
+
+    def root_nodes(self):
+        """Розкладає завершені чанки на найбільші повні вузли (не більше одного на рівень, крім верхнього)."""
+        finished = self.finished_chunks
+        start = 0
+        for level in range(len(TIER_TOLERANCES) - 1, -1, -1):
+            size = 2 ** level
+            while start + size <= finished:
+                yield (level, start // size)
+                start += size
+
+    def visible_nodes(self, tier, visible):
+        """Вузли (level, j, tier) для малювання, що перетинають visible = (left, top, right, bottom)."""
+        left, top, right, bottom = visible
+        stack = list(self.root_nodes())
+        while stack:
+            level, j = stack.pop()
+            min_x, min_y, max_x, max_y = self.bounds(level, j)
+            if max_x < left or min_x > right or max_y < top or min_y > bottom:
+                continue
+            if level <= tier:
+                yield (level, j, tier)
+            else:
+                stack.append((level - 1, 2 * j + 1))
+                stack.append((level - 1, 2 * j))
+
+    def tail(self):
+        """Незавершений хвіст траси, що малюється без спрощення."""
+        return self.points[self.finished_chunks * self.CHUNK_SIZE:]
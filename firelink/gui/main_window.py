@@ -3,13 +3,16 @@ import os
 import cv2
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QGroupBox, QScrollArea, QFrame
 from PyQt5.QtGui import QPalette, QColor, QFont, QImage, QPixmap
-from PyQt5.QtCore import Qt, QTimer, QSize
+from PyQt5.QtCore import Qt, QTimer, QSize, pyqtSignal
 from firelink.config.settings import config
+from firelink.core.clip_recorder import ClipRecorder
+from firelink.gui.track_view import TrackView
 
 class VideoPlayer(QWidget):
-    def __init__(self, video_path, parent=None):
+    def __init__(self, video_path, parent=None, recorder=None):
         super().__init__(parent)
         self.video_path = video_path
+        self.recorder = recorder
         self.cap = cv2.VideoCapture(self.video_path)
         self.label = QLabel(self)
         self.label.setAlignment(Qt.AlignCenter)
@@ -21,6 +24,8 @@ class VideoPlayer(QWidget):
         if self.cap.isOpened():
             ret, frame = self.cap.read()
             if ret:
+                if self.recorder:
+                    self.recorder.push_frame(frame)
                 rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 h, w, ch = rgb_image.shape
                 bytes_per_line = ch * w
@@ -177,8 +182,12 @@ class InfoCard(QGroupBox):
         """)
 
 class MainWindow(QWidget):
+    # Зміни стану лінку приходять з фонового потоку MAVLink і доставляються в GUI-потік
+    connection_status_changed = pyqtSignal(bool, bool, str, object)
+
     def __init__(self):
         super().__init__()
+        self.connection_status_changed.connect(self.update_connection_status)
         self.setWindowTitle("Firelink Ground Control")
         self.setGeometry(100, 100, 1280, 720)
         self.init_style()
@@ -212,6 +221,10 @@ class MainWindow(QWidget):
         self.scroll_area.setWidget(self.scroll_content)
         left_layout.addWidget(self.scroll_area)
 
+        # Flight track map
+        self.track_view = TrackView()
+        left_layout.addWidget(self.track_view)
+
         # drone card 
         self.drone_cards = {}
         self.add_drone_card("FireScan-X1")
@@ -279,10 +292,14 @@ class MainWindow(QWidget):
         video_layout.setContentsMargins(0, 0, 0, 0)
         video_layout.setSpacing(0)
 
+        # Рекордери кліпів подій для кожного знайденого відеоджерела
+        self.clip_recorders = {}
+
         self.main_video_player = None
         main_video_path = self.find_video_file("cam")
         if main_video_path:
-            self.main_video_player = VideoPlayer(main_video_path)
+            self.clip_recorders['cam'] = ClipRecorder('cam')
+            self.main_video_player = VideoPlayer(main_video_path, recorder=self.clip_recorders['cam'])
             video_layout.addWidget(self.main_video_player)
         else:
             # If no video found, just a black placeholder
@@ -295,7 +312,8 @@ class MainWindow(QWidget):
         self.thermal_video_player = None
         thermal_video_path = self.find_video_file("teplo")
         if thermal_video_path:
-            self.thermal_video_player = VideoPlayer(thermal_video_path, self.video_widget)
+            self.clip_recorders['teplo'] = ClipRecorder('teplo')
+            self.thermal_video_player = VideoPlayer(thermal_video_path, self.video_widget, recorder=self.clip_recorders['teplo'])
             self.thermal_video_player.setFixedSize(320, 180)
             self.thermal_video_player.setStyleSheet("border: 2px solid #00c8ff; border-radius: 8px; background-color: black;")
             self.thermal_video_player.move(self.video_widget.width() - self.thermal_video_player.width() - 20, 20)
@@ -346,15 +364,61 @@ class MainWindow(QWidget):
                 else:
                     label.setText(f"{key.capitalize()}: {value:.2f}")
 
-    def update_connection_status(self, is_connected, is_simulation=False):
+    def update_track(self, telemetry):
+        """Додає поточну позицію дрона до карти польоту."""
+        lat = telemetry.get('lat')
+        lon = telemetry.get('lon')
+        if lat is not None and lon is not None:
+            self.track_view.add_point(lat, lon)
+
+    def load_track_history(self, points, fire_events):
+        """Відновлює карту польоту з логів телеметрії та подій fire_coords_sent."""
+        self.track_view.add_points(points)
+        for event in fire_events:
+            data = event.get('data') or {}
+            if data.get('lat') is not None and data.get('lon') is not None:
+                self.track_view.add_fire_marker(data['lat'], data['lon'])
+
+    def add_fire_marker(self, lat, lon):
+        """Додає маркер пожежі на карту; безпечно викликати з фонових потоків."""
+        self.track_view.fire_marker_requested.emit(lat, lon)
+
+    def record_event_clips(self, event_type, on_done=None):
+        """Запускає запис кліпів з усіх джерел і повертає шляхи до них.
+
+        on_done(джерело, шлях, помилка) викликається з фонового потоку після запису кожного кліпу.
+        """
+        clips = {}
+        for name, recorder in self.clip_recorders.items():
+            callback = (lambda path, error, name=name: on_done(name, path, error)) if on_done else None
+            clips[name] = recorder.trigger(event_type, callback)
+        return clips
+
+    def update_connection_status(self, is_connected, is_simulation=False, state=None, info=None):
         """Оновлює статус з'єднання у логах."""
+        info = info or {}
         if is_connected:
             if is_simulation:
                 status = "Connected (Simulation)"
                 color = "RoyalBlue"
+            elif state == 'degraded':
+                status = f"Degraded (packet loss {info.get('packet_loss')}%)"
+                color = "orange"
+            elif info.get('packet_loss') is not None:
+                status = f"Connected (packet loss {info.get('packet_loss')}%)"
+                color = "green"
             else:
                 status = "Connected"
                 color = "green"
+        elif state == 'connecting':
+            status = f"Connecting to {info.get('port')}..."
+            color = "orange"
+        elif state == 'reconnecting':
+            status = f"Reconnecting in {info.get('retry_in')}s ({info.get('error')})"
+            color = "orange"
+        elif state == 'lost':
+            status = f"Link lost ({info.get('error')})"
+            color = "red"
         else:
             status = "Disconnected"
             color = "red"
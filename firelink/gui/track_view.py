@@ -0,0 +1,158 @@
+import math
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QPainter, QPen, QColor, QPolygonF, QTransform, QBrush
+from PyQt5.QtCore import Qt, QPointF, QRectF, pyqtSignal
+from firelink.core.track_lod import TrackLod, select_tier
+
+class TrackView(QWidget):
+    """Карта польоту без тайлів: траса дрона з рівнями деталізації та маркери пожеж."""
+
+    fire_marker_requested = pyqtSignal(float, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(220)
+
+        self.ref_cos = None
+        self.track = TrackLod()
+        # Кеш QPolygonF для вузлів дерева деталізації {(рівень, номер): ламана}
+        self.node_polygons = {}
+        self.fire_markers = []
+        # Межі траси та маркерів оновлюються інкрементально: (min_x, min_y, max_x, max_y)
+        self.bounds = None
+
+        # Вид: масштаб (пікселів на градус) і центр у світових координатах
+        self.auto_fit = True
+        self.scale = 1.0
+        self.center = QPointF(0, 0)
+        self.drag_origin = None
+
+        self.fire_marker_requested.connect(self.add_fire_marker)
+
+    def _project(self, lat, lon):
+        """Рівнопроміжна проекція навколо першої точки траси."""
+        if self.ref_cos is None:
+            self.ref_cos = math.cos(math.radians(lat))
+        return (lon * self.ref_cos, -lat)
+
+    def _extend_bounds(self, point):
+        x, y = point
+        if self.bounds is None:
+            self.bounds = (x, y, x, y)
+        else:
+            min_x, min_y, max_x, max_y = self.bounds
+            self.bounds = (min(min_x, x), min(min_y, y), max(max_x, x), max(max_y, y))
+
+    def add_point(self, lat, lon):
+        """Додає точку телеметрії до траси."""
+        point = self._project(lat, lon)
+        if self.track.append(point):
+            self._extend_bounds(point)
+            self.update()
+
+    def add_points(self, points):
+        """Додає до траси пакет точок (наприклад, історію з логу) з однією перерисовкою."""
+        for lat, lon in points:
+            point = self._project(lat, lon)
+            if self.track.append(point):
+                self._extend_bounds(point)
+        self.update()
+
+    def add_fire_marker(self, lat, lon):
+        """Додає маркер відправлених координат пожежі."""
+        point = self._project(lat, lon)
+        self.fire_markers.append(point)
+        self._extend_bounds(point)
+        self.update()
+
+    def _node_polygon(self, node):
+        polygon = self.node_polygons.get(node)
+        if polygon is None:
+            polygon = QPolygonF([QPointF(x, y) for x, y in self.track.node_path(*node)])
+            self.node_polygons[node] = polygon
+        return polygon
+
+    def _fit_to_track(self):
+        min_x, min_y, max_x, max_y = self.bounds
+        width = max(max_x - min_x, 1e-4)
+        height = max(max_y - min_y, 1e-4)
+        self.scale = 0.9 * min(self.width() / width, self.height() / height)
+        self.center = QPointF((max_x + min_x) / 2, (max_y + min_y) / 2)
+
+    def _transform(self):
+        transform = QTransform()
+        transform.translate(self.width() / 2, self.height() / 2)
+        transform.scale(self.scale, self.scale)
+        transform.translate(-self.center.x(), -self.center.y())
+        return transform
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor(18, 18, 18))
+
+        if not self.track.points and not self.fire_markers:
+            painter.setPen(QColor("#888"))
+            painter.drawText(self.rect(), Qt.AlignCenter, "No track data")
+            return
+
+        if self.auto_fit:
+            self._fit_to_track()
+        transform = self._transform()
+
+        if self.track.points:
+            painter.save()
+            painter.setTransform(transform)
+            pen = QPen(QColor("#00c8ff"), 2)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            # Малюємо лише видимі вузли дерева деталізації на рівні, що відповідає масштабу
+            inverse, _ = transform.inverted()
+            visible = inverse.mapRect(QRectF(self.rect()))
+            tier = select_tier(self.scale)
+            for node in self.track.visible_nodes(tier, (visible.left(), visible.top(), visible.right(), visible.bottom())):
+                painter.drawPolyline(self._node_polygon(node))
+            # Незавершений хвіст малюється без спрощення
+            painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in self.track.tail()]))
+            painter.restore()
+
+            x, y = self.track.points[-1]
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QBrush(QColor("#00ff94")))
+            painter.drawEllipse(transform.map(QPointF(x, y)), 5, 5)
+
+        painter.setPen(QPen(QColor("white"), 1))
+        painter.setBrush(QBrush(QColor("red")))
+        for x, y in self.fire_markers:
+            painter.drawEllipse(transform.map(QPointF(x, y)), 6, 6)
+
+    def wheelEvent(self, event):
+        factor = 1.25 if event.angleDelta().y() > 0 else 0.8
+        # Масштабування відносно курсора
+        before, _ = self._transform().inverted()
+        anchor = before.map(QPointF(event.pos()))
+        self.auto_fit = False
+        self.scale *= factor
+        after, _ = self._transform().inverted()
+        self.center += anchor - after.map(QPointF(event.pos()))
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_origin = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_origin is not None:
+            delta = event.pos() - self.drag_origin
+            self.drag_origin = event.pos()
+            self.auto_fit = False
+            self.center -= QPointF(delta.x() / self.scale, delta.y() / self.scale)
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        self.drag_origin = None
+
+    def mouseDoubleClickEvent(self, event):
+        """Подвійний клік повертає автоматичне вписування всієї траси."""
+        self.auto_fit = True
+        self.update()
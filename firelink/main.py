@@ -1,5 +1,6 @@
 import sys
 import threading
+from datetime import datetime, timedelta
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import QTimer
 from firelink.core.mavlink_service import MavlinkService
@@ -12,7 +13,7 @@ class FirelinkApp:
         self.app = QApplication(sys.argv)
         self.window = MainWindow()
         self.is_simulation = config.get('debug', True)
-        self.mav_service = MavlinkService(simulation=self.is_simulation)
+        self.mav_service = MavlinkService(simulation=self.is_simulation, on_state_change=self._on_link_state_change)
         self.log_service = LogService()
 
         self._connect_signals()
@@ -25,21 +26,58 @@ class FirelinkApp:
         self.window.simulate_fire_button.clicked.connect(self._simulate_fire)
         self.window.send_statustext_button.clicked.connect(self._send_statustext)
 
+    def _load_track_history(self):
+        """Заповнює карту польоту історією за останні track_history_hours годин."""
+        since = datetime.utcnow() - timedelta(hours=config.get('track_history_hours', 12))
+        try:
+            points = self.log_service.read_telemetry_track(since)
+            fire_events = self.log_service.query_events('fire_coords_sent', start=since)
+        except (OSError, ValueError) as e:
+            print(f"Failed to load track history: {e}")
+            return
+        self.window.load_track_history(points, fire_events)
+
+    def _on_link_state_change(self, state, info):
+        """Передає зміну стану лінку з потоку MAVLink у GUI."""
+        is_connected = state in MavlinkService.CONNECTED_STATES
+        self.window.connection_status_changed.emit(is_connected, self.is_simulation, state, info)
+
     def _update_telemetry(self):
         """Оновлює дані телеметрії в GUI та логує їх."""
+        if not self.mav_service.is_connected:
+            return
         telemetry = self.mav_service.get_telemetry()
         self.window.update_telemetry(telemetry)
+        has_fix = self.mav_service.has_position_fix()
+        if has_fix:
+            self.window.update_track(telemetry)
         if not self.is_simulation:
+            if not has_fix:
+                # Без фіксу координати не пишемо, щоб історія траси не містила плейсхолдерів
+                telemetry = dict(telemetry, lat=None, lon=None)
             self.log_service.log_telemetry(telemetry)
 
     def _simulate_fire(self):
         """Обробник для кнопки симуляції пожежі."""
         message = "Fire simulation requested!"
         self.window.log_message(message)
-        self.log_service.log_event("fire_simulation", {"source": "gui"})
+        clips = self.window.record_event_clips("fire_simulation", self._clip_logger("fire_simulation"))
+        self.log_service.log_event("fire_simulation", {"source": "gui", "clips": clips})
         print(message)
         self._send_statustext()
 
+    def _clip_logger(self, event_type):
+        """Повертає обробник, що логує фінальний статус кліпу, посилання на який вже записано в подію."""
+        def on_clip_done(source, path, error):
+            data = {"event_type": event_type, "source": source, "path": path}
+            if error is None:
+                data["status"] = "saved"
+            else:
+                data["status"] = "failed"
+                data["reason"] = error
+            self.log_service.log_event("event_clip", data)
+        return on_clip_done
+
     def _send_statustext(self):
         """Запускає відправку координат в окремому потоці."""
         thread = threading.Thread(target=self._send_fire_coords_thread, daemon=True)
@@ -59,12 +97,15 @@ class FirelinkApp:
 
         alt = telemetry.get('alt', 150.0)
         confidence = config.get('fire_confidence_threshold', 0.7)
+        # Кліп запускаємо в момент зчитування координат: ACK з повторами може прийти через десятки секунд
+        clips = self.window.record_event_clips("fire_coords", self._clip_logger("fire_coords"))
         success = self.mav_service.send_fire_coords(lat, lon, alt, confidence)
 
-        log_data = {"lat": lat, "lon": lon, "alt": alt, "confidence": confidence}
+        log_data = {"lat": lat, "lon": lon, "alt": alt, "confidence": confidence, "clips": clips}
         if success:
             log_data["status"] = "acknowledged"
             self.log_service.log_event("fire_coords_sent", log_data)
+            self.window.add_fire_marker(lat, lon)
             self.window.log_message(f"Fire coords sent and ACKed: {log_data}")
         else:
             log_data["status"] = "not_acknowledged"
@@ -73,19 +114,19 @@ class FirelinkApp:
 
     def run(self):
         """Запускає додаток."""
-        self.mav_service.connect()
-        self.window.update_connection_status(self.mav_service.is_connected, self.is_simulation)
+        self._load_track_history()
 
-        if self.mav_service.is_connected:
-            self.telemetry_timer.start(1000)
-        else:
-            self.window.log_message("Connection to Pixhawk failed.")
+        # Підключення йде у фоні, статус приходить через _on_link_state_change
+        self.mav_service.connect()
+        self.telemetry_timer.start(1000)
 
         self.window.show()
 
         exit_code = self.app.exec_()
 
         self.mav_service.close()
+        for recorder in self.window.clip_recorders.values():
+            recorder.close()
         self.log_service.close()
 
         sys.exit(exit_code)
@@ -0,0 +1,61 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from firelink.config.settings import config
+from firelink.core.clip_recorder import ClipRecorder
+
+T0 = 1_760_000_000.0
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    """Рекордер з малими інтервалами, що пише кліпи у тимчасовий каталог."""
+    monkeypatch.setitem(config, 'clip_recorder', {
+        'pre_seconds': 2, 'post_seconds': 1, 'max_buffer_mb': 1, 'clip_dir': str(tmp_path / "clips"),
+    })
+    recorder = ClipRecorder("cam")
+    yield recorder
+    recorder.close()
+
+def _jpeg(value):
+    frame = np.full((16, 16, 3), value, dtype=np.uint8)
+    ok, encoded = cv2.imencode('.jpg', frame)
+    assert ok
+    return encoded.tobytes()
+
+def test_append_drops_frames_older_than_pre_and_post_interval(recorder):
+    for i in range(10):
+        recorder._append_encoded(T0 + i, b"x" * 10)
+    # Горизонт pre + post = 3 с від останнього кадру
+    assert [t - T0 for t, _ in recorder.frames] == [6, 7, 8, 9]
+    assert recorder.buffer_bytes == 40
+
+def test_append_evicts_oldest_frames_over_byte_cap(recorder):
+    chunk = recorder.max_buffer_bytes // 4
+    for i in range(6):
+        recorder._append_encoded(T0 + i * 0.1, bytes([i]) * chunk)
+    assert recorder.buffer_bytes <= recorder.max_buffer_bytes
+    assert [data[0] for _, data in recorder.frames] == [2, 3, 4, 5]
+    assert recorder.buffer_bytes == sum(len(data) for _, data in recorder.frames)
+
+def test_write_clip_keeps_only_frames_of_event_window(recorder):
+    event_time = T0 + 4.5
+    # Кадри кожні 0.5 с з T0 по T0 + 7: у буфері лишаються [4, 7], а у вікно [2.5, 5.5] потрапляють 4 з них
+    for i in range(15):
+        recorder._append_encoded(T0 + i * 0.5, _jpeg(i * 10))
+    clip_path = recorder.clip_dir / "event.avi"
+
+    assert recorder._write_clip(event_time, clip_path) is None
+    capture = cv2.VideoCapture(str(clip_path))
+    try:
+        assert int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) == 4
+        assert capture.get(cv2.CAP_PROP_FPS) == pytest.approx(2.0)
+    finally:
+        capture.release()
+
+def test_write_clip_reports_empty_window(recorder):
+    recorder._append_encoded(T0, _jpeg(0))
+    clip_path = recorder.clip_dir / "late.avi"
+    assert recorder._write_clip(T0 + 60, clip_path) == "no buffered frames"
+    assert not clip_path.exists()
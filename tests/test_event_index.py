@@ -0,0 +1,103 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from logging.handlers import RotatingFileHandler
+
+import pytest
+
+from firelink.core.event_index import EventIndex
+
+T0 = datetime(2026, 10, 13, 22, 0)
+
+@pytest.fixture
+def event_log(tmp_path):
+    """Пише 120 подій у маленькі ротовані файли, як це робить LogService."""
+    log_path = tmp_path / "events.json"
+    handler = RotatingFileHandler(log_path, maxBytes=2000, backupCount=5)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = logging.getLogger(f"EventIndexTest.{tmp_path.name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    entries = []
+    for i in range(120):
+        if i % 3 == 0:
+            entry = {"timestamp": (T0 + timedelta(minutes=i)).isoformat(), "event_type": "fire_coords_failed",
+                     "data": {"lat": 50.0 + i * 0.001, "lon": 30.0}}
+        else:
+            entry = {"timestamp": (T0 + timedelta(minutes=i)).isoformat(), "event_type": "fire_simulation",
+                     "data": {"source": "gui"}}
+        logger.info(json.dumps(entry))
+        entries.append(entry)
+    handler.close()
+    logger.removeHandler(handler)
+    return log_path, entries
+
+def _retained(log_path, entries):
+    """Події, що лишились після ротації (найстаріші файли вже видалені)."""
+    kept = set()
+    for path in log_path.parent.glob("events.json*"):
+        if path.is_file():
+            kept.update(path.read_text().splitlines())
+    return [e for e in entries if json.dumps(e) in kept]
+
+def _rotate(log_dir, backup_count=5):
+    """Імітує ротацію RotatingFileHandler і пише в новий events.json одну подію."""
+    for i in range(backup_count, 0, -1):
+        src = log_dir / (f"events.json.{i - 1}" if i > 1 else "events.json")
+        if src.is_file():
+            src.replace(log_dir / f"events.json.{i}")
+    extra = {"timestamp": (T0 + timedelta(hours=3)).isoformat(), "event_type": "fire_coords_failed",
+             "data": {"lat": 51.0, "lon": 31.0}}
+    (log_dir / "events.json").write_text(json.dumps(extra) + "\n")
+    return extra
+
+def test_query_spans_rotated_files(event_log):
+    log_path, entries = event_log
+    assert (log_path.parent / "events.json.1").is_file()
+
+    index = EventIndex(log_path, backup_count=5)
+    expected = [e for e in _retained(log_path, entries) if e['event_type'] == "fire_coords_failed"]
+    assert index.query("fire_coords_failed") == expected
+    assert len(index.query()) == len(_retained(log_path, entries))
+
+def test_bbox_and_time_range(event_log):
+    log_path, entries = event_log
+    index = EventIndex(log_path, backup_count=5)
+
+    result = index.query("fire_coords_failed", start=T0 + timedelta(minutes=100), bbox=(50.09, 29.9, 50.11, 30.1))
+    assert [e['data']['lat'] for e in result] == pytest.approx([50.102, 50.105, 50.108])
+
+    # Дата без часу як --until включає весь день
+    same_day = index.query(end="2026-10-13")
+    assert same_day and all(e['timestamp'] < "2026-10-14" for e in same_day)
+    assert len(same_day) == len([e for e in _retained(log_path, entries) if e['timestamp'] < "2026-10-14"])
+
+def test_index_persists_and_follows_rotation(event_log, tmp_path):
+    log_path, entries = event_log
+    index = EventIndex(log_path, backup_count=5)
+    index.update()
+    index.close()
+
+    extra = _rotate(tmp_path)
+
+    reloaded = EventIndex(log_path, backup_count=5)
+    assert len(reloaded.segments) == len(index.segments)
+    result = reloaded.query("fire_coords_failed", bbox=(50.5, 30.5, 51.5, 31.5))
+    assert result == [extra]
+    assert reloaded.query("fire_coords_failed")[-1] == extra
+
+def test_query_detects_rotation_after_indexing(event_log, tmp_path):
+    log_path, entries = event_log
+    index = EventIndex(log_path, backup_count=5)
+    index.update()
+    extra = _rotate(tmp_path)
+
+    # Зміщення застарілого індексу не повинні читатись з файлів, що тепер містять інші сегменти
+    assert index._query("fire_coords_failed", None, None, None) is None
+    result = index.query("fire_coords_failed")
+    assert result[-1] == extra
+    assert all(e['event_type'] == "fire_coords_failed" for e in result)
+    expected = [e for e in _retained(log_path, entries + [extra]) if e['event_type'] == "fire_coords_failed"]
+    assert result == expected
@@ -0,0 +1,136 @@
+import threading
+from collections import deque
+
+import pytest
+
+pytest.importorskip("pymavlink")
+
+from firelink.config.settings import config
+from firelink.core import mavlink_service
+from firelink.core.mavlink_service import MavlinkService
+
+class FakeHeartbeat:
+    autopilot = mavlink_service.mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA
+
+    def get_type(self):
+        return 'HEARTBEAT'
+
+    def get_srcSystem(self):
+        return 1
+
+class FakeConnection:
+    """Мінімальне з'єднання: лічильники pymavlink і recv_match, що видає heartbeat, а потім обривається."""
+
+    def __init__(self):
+        self.mav_loss = 0
+        self.mav_count = 0
+        self.closed = False
+
+    def recv_match(self, type=None, blocking=False, timeout=None):
+        if type == 'HEARTBEAT':
+            return FakeHeartbeat()
+        raise OSError("device disconnected")
+
+    def close(self):
+        self.closed = True
+
+class RecordingStop(threading.Event):
+    """stop_event, що записує паузи backoff замість того, щоб чекати."""
+
+    def __init__(self):
+        super().__init__()
+        self.waits = []
+
+    def wait(self, timeout=None):
+        self.waits.append(timeout)
+        return self.is_set()
+
+@pytest.fixture
+def states():
+    return []
+
+@pytest.fixture
+def service(monkeypatch, states):
+    monkeypatch.setitem(config['pixhawk'], 'reconnect_backoff', [1, 4])
+    monkeypatch.setitem(config['pixhawk'], 'degraded_packet_loss', 20)
+    monkeypatch.setitem(config['pixhawk'], 'link_quality_window', 3)
+    monkeypatch.setitem(config['pixhawk'], 'link_quality_report_interval', 5)
+    return MavlinkService(on_state_change=lambda state, info: states.append((state, dict(info))))
+
+def _connect(service, conn, now=100.0):
+    service.conn = conn
+    service.autopilot_sysid = 1
+    service.last_heartbeat = now
+    service.loss_samples = deque([(conn.mav_loss, conn.mav_count)], maxlen=service.link_quality_window + 1)
+    service._set_state('connected')
+
+def _tick(service, conn, now, received, lost):
+    conn.mav_count += received
+    conn.mav_loss += lost
+    service._update_link_quality(now)
+
+def test_link_quality_uses_sliding_window_and_switches_state(service, states):
+    conn = FakeConnection()
+    _connect(service, conn)
+
+    # Тривала чиста робота не повинна маскувати свіжі втрати
+    for second in range(1, 101):
+        _tick(service, conn, 100.0 + second, received=10, lost=0)
+    assert service.link_state == 'connected'
+
+    _tick(service, conn, 201.0, received=5, lost=5)
+    _tick(service, conn, 202.0, received=5, lost=5)
+    assert service.link_state == 'degraded'
+    assert service.is_connected
+    assert service.link_info['packet_loss'] == pytest.approx(100.0 * 10 / 30, abs=0.1)
+
+    # Після вікна з чистих секунд втрати забуваються
+    for second in range(3, 6):
+        _tick(service, conn, 200.0 + second, received=10, lost=0)
+    assert service.link_state == 'connected'
+    assert service.link_info['packet_loss'] == 0.0
+    # Окрім переходів підписник отримує й звіти про якість, тож порівнюємо лише зміни стану
+    transitions = [state for i, (state, _) in enumerate(states) if i == 0 or states[i - 1][0] != state]
+    assert transitions == ['connected', 'degraded', 'connected']
+
+def test_link_quality_changes_are_reported_at_most_once_per_interval(service, states):
+    conn = FakeConnection()
+    _connect(service, conn)
+    del states[:]
+
+    # Втрати 5-15% не змінюють стан, тож про них повідомляємо з обмеженням частоти
+    for second, lost in enumerate([1, 2, 1, 2, 1, 2, 1, 2], start=1):
+        _tick(service, conn, 100.0 + second, received=10, lost=lost)
+    assert service.link_state == 'connected'
+    # Heartbeat востаннє оновлено в момент підключення, тож його вік дорівнює часу від старту
+    report_times = [info['heartbeat_age'] for _, info in states]
+    assert len(states) == 2
+    assert report_times[1] - report_times[0] >= service.link_quality_report_interval
+
+def test_run_backs_off_exponentially_and_resets_after_connect(service, states, monkeypatch):
+    # Чотири невдалі спроби, одне успішне з'єднання, що обривається, і ще одна невдача
+    attempts = iter([OSError("no device")] * 4 + [FakeConnection(), OSError("no device")])
+
+    def fake_connection(*args, **kwargs):
+        result = next(attempts)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(mavlink_service.mavutil, 'mavlink_connection', fake_connection)
+    service.stop_event = RecordingStop()
+
+    def on_state_change(state, info):
+        states.append((state, dict(info)))
+        if sum(1 for s, _ in states if s == 'reconnecting') == 6:
+            service.stop_event.set()
+
+    service.on_state_change = on_state_change
+    service._run()
+
+    retries = [info['retry_in'] for state, info in states if state == 'reconnecting']
+    assert retries == [1, 2, 4, 4, 1, 2]
+    assert service.stop_event.waits[:5] == [1, 2, 4, 4, 1]
+    assert 'lost' in [state for state, _ in states]
+    assert states[-1][0] == 'disconnected'
+    assert not service.is_connected
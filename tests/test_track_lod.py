@@ -0,0 +1,94 @@
+import math
+import random
+
+import pytest
+
+from firelink.core.track_lod import TIER_TOLERANCES, TrackLod, select_tier, simplify_path
+
+def _segment_distance(p, a, b):
+    (px, py), (ax, ay), (bx, by) = p, a, b
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+def _random_track(n, seed=1):
+    """Плавна випадкова траса дрона з кроком ~5 м."""
+    rng = random.Random(seed)
+    x = y = heading = 0.0
+    points = []
+    for _ in range(n):
+        heading += rng.gauss(0, 0.05)
+        x += math.cos(heading) * 5e-5
+        y += math.sin(heading) * 5e-5
+        points.append((x, y))
+    return points
+
+def _fill(points):
+    lod = TrackLod()
+    for p in points:
+        lod.append(p)
+    return lod
+
+def test_simplify_path_collapses_straight_line_and_keeps_endpoints():
+    line = [(i * 0.001, i * 0.002) for i in range(100)]
+    assert simplify_path(line, 1e-6) == [line[0], line[-1]]
+    assert simplify_path(line, 0) == line
+
+def test_simplify_path_stays_within_tolerance():
+    points = _random_track(2000)
+    tolerance = 2e-4
+    simplified = simplify_path(points, tolerance)
+    assert len(simplified) < len(points) // 10
+    assert simplified[0] == points[0] and simplified[-1] == points[-1]
+    # Кожна вихідна точка лежить не далі за допуск від спрощеної ламаної
+    for p in points:
+        assert min(_segment_distance(p, a, b) for a, b in zip(simplified, simplified[1:])) <= tolerance + 1e-12
+
+def test_select_tier_matches_half_pixel_error():
+    assert select_tier(1e9) == 0
+    assert select_tier(1.0) == len(TIER_TOLERANCES) - 1
+    scale = 1000.0
+    tier = select_tier(scale)
+    assert TIER_TOLERANCES[tier] <= 0.5 / scale < TIER_TOLERANCES[tier + 1]
+    # Більший масштаб (наближення) ніколи не дає грубішого рівня
+    tiers = [select_tier(s) for s in (10, 100, 1000, 10000, 100000)]
+    assert tiers == sorted(tiers, reverse=True)
+
+@pytest.mark.parametrize("hours", [12, 48])
+def test_zoomed_out_draw_cost_matches_whole_path_simplification(hours):
+    points = _random_track(hours * 3600)
+    lod = _fill(points)
+    xs, ys = [p[0] for p in points], [p[1] for p in points]
+    visible = (min(xs), min(ys), max(xs), max(ys))
+    tier = select_tier(300 / max(visible[2] - visible[0], visible[3] - visible[1]))
+
+    nodes = list(lod.visible_nodes(tier, visible))
+    drawn = sum(len(lod.node_path(*node)) for node in nodes)
+    whole = len(simplify_path(points[:lod.finished_chunks * lod.CHUNK_SIZE + 1], TIER_TOLERANCES[tier]))
+    # Кількість вузлів обмежена розкладом на повні групи, а не довжиною польоту
+    assert len(nodes) <= 16
+    assert drawn <= whole * 1.2 + 2 * len(nodes)
+
+def test_visible_nodes_cull_and_cover_track_continuously():
+    points = _random_track(20 * TrackLod.CHUNK_SIZE + 10)
+    lod = _fill(points)
+
+    everything = (-1e9, -1e9, 1e9, 1e9)
+    nodes = sorted(lod.visible_nodes(0, everything))
+    assert len(nodes) == lod.finished_chunks
+    # Сусідні вузли стикуються, а хвіст продовжує останній вузол
+    paths = [lod.node_path(*node) for node in nodes]
+    for left, right in zip(paths, paths[1:]):
+        assert left[-1] == right[0]
+    assert paths[-1][-1] == lod.tail()[0]
+    assert lod.tail()[-1] == points[-1]
+
+    # Вікно навколо однієї точки бачить лише вузли, що її містять
+    x, y = points[5 * TrackLod.CHUNK_SIZE + 100]
+    window = (x - 1e-6, y - 1e-6, x + 1e-6, y + 1e-6)
+    culled = list(lod.visible_nodes(0, window))
+    assert 1 <= len(culled) < 5
+    for level, j, _ in culled:
+        min_x, min_y, max_x, max_y = lod.bounds(level, j)
+        assert min_x <= x <= max_x and min_y <= y <= max_y